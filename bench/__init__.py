@@ -0,0 +1,8 @@
+"""
+压测工具：
+    python -m bench.seed --scale 100k            生成可复现的测试数据
+    python -m bench.loadtest --url http://127.0.0.1:5000 --duration 60 --output run.json
+    python -m bench.compare base.json run.json   对比两次结果
+
+需要本地 MySQL，连接配置与 app.py 相同（MYSQLHOST / MYSQLUSER / ...），并设置 ALLOW_LOCAL_MYSQL=1。
+"""
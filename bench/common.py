@@ -0,0 +1,35 @@
+import math
+
+
+def connect():
+    # 延迟导入：导入 app 会打印启动信息并连库检查 schema 版本（AUTO_MIGRATE=1 时还会执行迁移），只有真正需要数据库时才触发
+    from app import open_raw_conn
+    return open_raw_conn()
+
+
+def mysql_questions(conn):
+    """
+    MySQL 全局 Questions 计数，压测前后相减即可得到服务端执行的语句数。
+    """
+    with conn.cursor() as c:
+        c.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        row = c.fetchone()
+    return int(row["Value"]) if row else 0
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def latency_summary(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0
+    }
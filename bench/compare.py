@@ -0,0 +1,48 @@
+import argparse
+import json
+
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(base, run):
+    rows = []
+    sections = [("total", dict(base["latency"], throughput_rps=base["throughput_rps"]),
+                 dict(run["latency"], throughput_rps=run["throughput_rps"]))]
+    for name in sorted(set(base["endpoints"]) & set(run["endpoints"])):
+        sections.append((name, base["endpoints"][name], run["endpoints"][name]))
+
+    for name, old, new in sections:
+        for metric in METRICS:
+            rows.append((name, metric, old.get(metric, 0), new.get(metric, 0), change(old.get(metric, 0), new.get(metric, 0))))
+
+    if "sql" in base and "sql" in run:
+        old_qpr = base["sql"]["queries_per_request"]
+        new_qpr = run["sql"]["queries_per_request"]
+        rows.append(("total", "queries_per_request", old_qpr, new_qpr, change(old_qpr, new_qpr)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两份 bench.loadtest 报告")
+    parser.add_argument("base")
+    parser.add_argument("run")
+    args = parser.parse_args(argv)
+
+    for name, metric, old, new, delta in compare(load(args.base), load(args.run)):
+        print(f"{name:<16} {metric:<20} {old:>12} {new:>12} {delta:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+
+from bench.common import connect, latency_summary, mysql_questions
+from bench.seed import client_pool
+
+
+DEFAULT_MIX = "messages=80,messages_next=8,reply=6,toggle_like=5,upload=1"
+
+# 1x1 PNG；末尾追加随机字节让每次上传的内容哈希不同，避免全部命中去重
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000005000157a3b5c1"
+    "0000000049454e44ae426082"
+)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for name, value in fields.items():
+        body += f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode()
+    for name, (filename, content, content_type) in files.items():
+        body += (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        body += content + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return bytes(body), f"multipart/form-data; boundary={boundary}"
+
+
+class Driver:
+    def __init__(self, base_url, mix, clients, image_ratio, page_size, seed, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.mix = mix
+        self.clients = client_pool(clients)
+        self.image_ratio = image_ratio
+        self.page_size = page_size
+        self.seed = seed
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in mix}
+        self.errors = {name: 0 for name in mix}
+        self.status_codes = {}
+        self.known_ids = []
+
+    def request(self, method, path, ip, body=None, content_type=None):
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        # 压测直连 gunicorn 时本工具扮演那一层可信代理（默认 TRUSTED_PROXY_HOPS=1），
+        # 用 X-Forwarded-For 模拟不同的访客；应用前面还有代理时按实际层数补齐
+        req.add_header("X-Forwarded-For", ip)
+        if content_type:
+            req.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as res:
+                return res.status, res.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def refresh_ids(self):
+        status, body = self.request("GET", "/messages?limit=100", "10.255.255.254")
+        if status == 200:
+            ids = [m["id"] for m in json.loads(body).get("messages", [])]
+            if ids:
+                self.known_ids = ids
+
+    def run_op(self, name, rng, ip, state):
+        if name == "messages":
+            status, body = self.request("GET", f"/messages?limit={self.page_size}", ip)
+            if status == 200:
+                state["cursor"] = json.loads(body).get("next_cursor")
+            return status
+        if name == "messages_next":
+            cursor = state.get("cursor")
+            path = f"/messages?limit={self.page_size}" + (f"&before_id={cursor}" if cursor else "")
+            status, body = self.request("GET", path, ip)
+            if status == 200:
+                state["cursor"] = json.loads(body).get("next_cursor")
+            return status
+        if name == "reply":
+            message_id = rng.choice(self.known_ids) if self.known_ids else 1
+            body, content_type = encode_multipart({"message_id": message_id, "reply_content": f"bench {rng.random()}"}, {})
+            return self.request("POST", "/reply", ip, body, content_type)[0]
+        if name == "toggle_like":
+            message_id = rng.choice(self.known_ids) if self.known_ids else 1
+            body, content_type = encode_multipart({"message_id": message_id}, {})
+            return self.request("POST", "/toggle_like", ip, body, content_type)[0]
+        if name == "upload":
+            files = {}
+            if rng.random() < self.image_ratio:
+                files["image"] = ("bench.png", TINY_PNG + rng.randbytes(16), "image/png")
+            body, content_type = encode_multipart({"content": f"bench {rng.random()}"}, files)
+            return self.request("POST", "/upload", ip, body, content_type)[0]
+        raise ValueError(f"unknown op {name}")
+
+    def worker(self, index, deadline, max_requests, counter):
+        rng = random.Random(self.seed * 1000 + index)
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        state = {}
+        while time.perf_counter() < deadline:
+            with self.lock:
+                if max_requests and counter[0] >= max_requests:
+                    return
+                counter[0] += 1
+            name = rng.choices(names, weights)[0]
+            ip = rng.choice(self.clients)
+            started = time.perf_counter()
+            try:
+                status = self.run_op(name, rng, ip, state)
+            except Exception:
+                status = 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self.lock:
+                self.latencies[name].append(elapsed_ms)
+                self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+                if status not in (200, 304):
+                    self.errors[name] += 1
+
+    def prepare(self, warmup):
+        self.refresh_ids()
+        for _ in range(warmup):
+            self.request("GET", f"/messages?limit={self.page_size}", "10.255.255.253")
+
+    def run(self, concurrency, duration, max_requests):
+        counter = [0]
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=self.worker, args=(i, deadline, max_requests, counter), daemon=True)
+            for i in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按读写比例回放请求并输出 JSON 报告")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"请求比例，默认 {DEFAULT_MIX}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="持续秒数")
+    parser.add_argument("--requests", type=int, default=0, help="总请求数上限，0 表示只按时长")
+    parser.add_argument("--clients", type=int, default=5000, help="模拟的访客 IP 数量")
+    parser.add_argument("--image-ratio", type=float, default=0.2, help="发帖中带图片的比例")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="正式开始前的预热请求数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--no-sql-stats", action="store_true", help="不读取 MySQL Questions 计数")
+    parser.add_argument("--label", default="", help="写入报告的备注，例如 git 提交号")
+    parser.add_argument("--output", help="报告输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    driver = Driver(args.url, parse_mix(args.mix), args.clients, args.image_ratio, args.page_size, args.seed, args.timeout)
+
+    conn = None if args.no_sql_stats else connect()
+    try:
+        driver.prepare(args.warmup)
+        questions_before = mysql_questions(conn) if conn else None
+        elapsed = driver.run(args.concurrency, args.duration, args.requests)
+        questions_after = mysql_questions(conn) if conn else None
+    finally:
+        if conn:
+            conn.close()
+
+    total = sum(len(v) for v in driver.latencies.values())
+    endpoints = {}
+    for name, values in driver.latencies.items():
+        endpoints[name] = dict(
+            latency_summary(values),
+            requests=len(values),
+            errors=driver.errors[name],
+            throughput_rps=round(len(values) / elapsed, 3) if elapsed else 0.0
+        )
+
+    report = {
+        "label": args.label,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "url": args.url,
+            "mix": driver.mix,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "image_ratio": args.image_ratio,
+            "page_size": args.page_size,
+            "seed": args.seed
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+        "errors": sum(driver.errors.values()),
+        "status_codes": driver.status_codes,
+        "latency": latency_summary([v for values in driver.latencies.values() for v in values]),
+        "endpoints": endpoints
+    }
+    if questions_before is not None:
+        # 差值里包含本工具自己的一条 SHOW STATUS，规模足够大时可以忽略
+        questions = questions_after - questions_before
+        report["sql"] = {
+            "questions": questions,
+            "queries_per_request": round(questions / total, 3) if total else 0.0
+        }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from bench.common import connect
+
+
+SCALES = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000,
+    "1m": 1000000
+}
+
+WORDS = [
+    "今天", "食堂", "考试", "周末", "有人", "一起", "打球", "作业", "老师", "好难",
+    "哈哈哈", "求助", "表白", "同桌", "下雨", "放学", "社团", "班会", "奶茶", "图书馆"
+]
+
+
+def random_content(rng):
+    return "".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+
+
+def client_pool(size):
+    return [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(size)]
+
+
+def insert_batches(conn, sql, rows, batch_size):
+    with conn.cursor() as c:
+        for i in range(0, len(rows), batch_size):
+            # pymysql 会把 INSERT ... VALUES 的 executemany 改写成一条多行 INSERT
+            c.executemany(sql, rows[i:i + batch_size])
+    conn.commit()
+
+
+def truncate(conn):
+    with conn.cursor() as c:
+        tables = ["likes", "replies", "messages", "board_changes"]
+        # 执行过冷热分离迁移时一并清空归档表，否则旧数据仍会出现在分页末尾
+        c.execute("SHOW TABLES LIKE %s", ("%\\_archive",))
+        tables += sorted(list(row.values())[0] for row in c.fetchall())
+        for table in tables:
+            c.execute(f"TRUNCATE TABLE `{table}`")
+    conn.commit()
+
+
+def seed(conn, messages, replies_per_message, likes_per_message, clients, seed_value, batch_size, chunk_size):
+    rng = random.Random(seed_value)
+    pool = client_pool(clients)
+
+    with conn.cursor() as c:
+        c.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM messages")
+        next_id = c.fetchone()["max_id"] + 1
+
+    started_at = datetime(2024, 1, 1)
+    step = timedelta(days=365) / max(messages, 1)
+    totals = {"messages": 0, "replies": 0, "likes": 0}
+
+    # 分块生成，内存占用与 chunk_size 成正比，而不是总行数
+    for chunk_start in range(0, messages, chunk_size):
+        message_rows, reply_rows, like_rows = [], [], []
+        for i in range(chunk_start, min(messages, chunk_start + chunk_size)):
+            message_id = next_id + i
+            created = started_at + step * i
+
+            n_likes = min(len(pool), int(rng.expovariate(1 / likes_per_message))) if likes_per_message else 0
+            for ip in rng.sample(pool, n_likes):
+                like_rows.append((message_id, ip))
+
+            n_replies = int(rng.expovariate(1 / replies_per_message)) if replies_per_message else 0
+            for j in range(n_replies):
+                reply_created = created + timedelta(minutes=j + 1)
+                reply_rows.append((
+                    message_id,
+                    f"匿名用户{rng.randint(0, 999999)}",
+                    random_content(rng),
+                    reply_created.strftime("%Y-%m-%d %H:%M:%S")
+                ))
+
+            message_rows.append((
+                message_id,
+                f"匿名用户{rng.randint(0, 999999)}",
+                random_content(rng),
+                created.strftime("%Y-%m-%d %H:%M:%S"),
+                n_likes,
+                n_replies
+            ))
+
+        insert_batches(conn, """
+            INSERT INTO messages (id, username, content, created_at, like_count, reply_count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, message_rows, batch_size)
+        insert_batches(conn, """
+            INSERT INTO replies (message_id, username, content, created_at)
+            VALUES (%s, %s, %s, %s)
+        """, reply_rows, batch_size)
+        insert_batches(conn, """
+            INSERT IGNORE INTO likes (message_id, username)
+            VALUES (%s, %s)
+        """, like_rows, batch_size)
+
+        totals["messages"] += len(message_rows)
+        totals["replies"] += len(reply_rows)
+        totals["likes"] += len(like_rows)
+        print(f"  {totals['messages']}/{messages} messages", flush=True)
+
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成可复现的压测数据")
+    parser.add_argument("--scale", choices=sorted(SCALES), help="预设留言数量")
+    parser.add_argument("--messages", type=int, help="留言数量，覆盖 --scale")
+    parser.add_argument("--replies-per-message", type=float, default=2.0, help="平均每条留言的回复数")
+    parser.add_argument("--likes-per-message", type=float, default=5.0, help="平均每条留言的点赞数")
+    parser.add_argument("--clients", type=int, default=5000, help="模拟的访客 IP 数量")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000, help="每条多行 INSERT 的行数")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="每次在内存中生成的留言数")
+    parser.add_argument("--truncate", action="store_true", help="先清空 messages / replies / likes / board_changes 和归档表")
+    args = parser.parse_args(argv)
+
+    messages = args.messages or SCALES.get(args.scale or "1k")
+    conn = connect()
+    try:
+        if args.truncate:
+            truncate(conn)
+        started = time.perf_counter()
+        totals = seed(
+            conn,
+            messages,
+            args.replies_per_message,
+            args.likes_per_message,
+            args.clients,
+            args.seed,
+            args.batch_size,
+            args.chunk_size
+        )
+    finally:
+        conn.close()
+
+    print(f"seeded {totals} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+gunicorn 配置：gunicorn app:app 会自动读取当前目录下的本文件。
+
+主进程预加载 app（只打印一次启动信息、只检查一次数据库版本），worker 通过 fork 共享只读内存；
+fork 前关闭主进程的数据库连接，fork 后每个 worker 重建自己的连接池和推送线程，不会共用 socket。
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+preload_app = True
+
+# gthread：每个 worker 多线程处理请求。SSE 长连接在整个连接期间占住一个线程，
+# 所以每个 worker 的推送连接数限制在线程数的一半（EVENTS_MAX_SUBSCRIBERS），
+# 其余线程始终留给普通请求，超出的客户端退回 /messages/changes 轮询
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = env_int("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 8))
+threads = env_int("GUNICORN_THREADS", 32)
+# 配置文件先于预加载的 app 执行，app 按这里的值读取环境变量
+os.environ.setdefault("EVENTS_MAX_SUBSCRIBERS", str(max(1, threads // 2)))
+# 各 worker 把指标写到这个目录，/metrics 落到哪个 worker 都输出全部 worker 的汇总
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="babble-metrics-"))
+
+# 每个 worker 处理一定数量请求后平滑重启，限制内存增长；jitter 避免所有 worker 同时重启
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def on_starting(server):
+    # 显式指定的 METRICS_DIR 里可能留着上次运行的文件，不清掉会被算进这次的计数
+    metrics_dir = os.environ["METRICS_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+
+
+def pre_fork(server, worker):
+    # 主进程预加载时连过数据库，fork 前关掉，避免子进程继承同一条 MySQL 连接
+    import app
+    app.DB_POOL.close_all()
+    app.REPLICA_ROUTER.close_all()
+
+
+def post_fork(server, worker):
+    import app
+    app.DB_POOL.reset()
+    app.REPLICA_ROUTER.reset()
+    app.EVENT_HUB.reset()
+    app.init_worker_metrics()
+
+
+def worker_exit(server, worker):
+    import app
+    app.flush_metrics(final=True)
+
+
+def child_exit(server, worker):
+    # worker 被 kill（如超时）时来不及自己清理，由主进程删掉它的 gauge 文件
+    import app
+    app.remove_worker_gauges(worker.pid)
+
+
+def post_worker_init(worker):
+    import app
+    try:
+        app.DB_POOL.warmup()
+    except Exception:
+        worker.log.exception("DB pool warmup failed")
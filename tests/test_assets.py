@@ -0,0 +1,78 @@
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+import app as babble
+
+
+@pytest.fixture
+def asset_dirs(tmp_path, monkeypatch):
+    source = tmp_path / "static"
+    build = tmp_path / "dist"
+    (source / "css").mkdir(parents=True)
+    (source / "img").mkdir()
+    monkeypatch.setattr(babble, "ASSET_SOURCE_DIR", str(source))
+    monkeypatch.setattr(babble, "ASSET_BUILD_DIR", str(build))
+    monkeypatch.setattr(babble, "ASSET_MANIFEST", {})
+    return source, build
+
+
+def test_build_assets_hashes_compresses_and_rewrites_urls(asset_dirs):
+    source, build = asset_dirs
+    (source / "img" / "logo.svg").write_text("<svg></svg>", encoding="utf-8")
+    (source / "css" / "style.css").write_text(".logo { content: url('../img/logo.svg'); }\n", encoding="utf-8")
+
+    manifest = babble.build_assets(echo=lambda text: None)
+
+    logo = manifest["img/logo.svg"]
+    css = manifest["css/style.css"]
+    assert logo == babble.hashed_name("img/logo.svg", b"<svg></svg>")
+    assert css.startswith("css/style.") and css.endswith(".css")
+    built_css = (build / css).read_text(encoding="utf-8")
+    assert f'url("../{logo}")' in built_css
+    assert gzip.decompress((build / (css + ".gz")).read_bytes()).decode("utf-8") == built_css
+    assert json.loads((build / "manifest.json").read_text(encoding="utf-8")) == manifest
+    assert babble.ASSET_MANIFEST == manifest
+
+
+def test_build_assets_generates_background_variants(asset_dirs):
+    Image = pytest.importorskip("PIL.Image")
+    source, build = asset_dirs
+    buf = io.BytesIO()
+    Image.new("RGB", (1600, 900), (200, 120, 40)).save(buf, "PNG")
+    (source / "img" / "bg.png").write_bytes(buf.getvalue())
+    (source / "css" / "page.css").write_text("body {\n    background-image: url('../img/bg.png');\n}\n", encoding="utf-8")
+
+    manifest = babble.build_assets(echo=lambda text: None)
+
+    for width in babble.BACKGROUND_VARIANT_WIDTHS:
+        assert f"img/bg-{width}.webp" in manifest
+        assert f"img/bg-{width}.jpg" in manifest
+    built_css = (build / manifest["css/page.css"]).read_text(encoding="utf-8")
+    assert "image-set(" in built_css
+    assert f"@media {babble.BACKGROUND_SMALL_SCREEN}" in built_css
+    assert "bg.png" not in built_css
+
+
+def test_asset_url_and_route(asset_dirs, flask_app):
+    source, build = asset_dirs
+    (source / "css" / "a.css").write_text("body { color: red; }" * 50, encoding="utf-8")
+    manifest = babble.build_assets(echo=lambda text: None)
+
+    with flask_app.test_request_context("/"):
+        assert babble.asset_url("css/a.css") == "/assets/" + manifest["css/a.css"]
+        assert babble.asset_url("css/missing.css") == "/static/css/missing.css"
+
+    client = flask_app.test_client()
+    response = client.get("/assets/" + manifest["css/a.css"], headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert gzip.decompress(response.data) == (build / manifest["css/a.css"]).read_bytes()
+
+    assert client.get("/assets/manifest.json").status_code == 404
+    assert client.get("/assets/" + manifest["css/a.css"] + ".gz").status_code == 404
+    assert os.path.isfile(build / "manifest.json")
@@ -0,0 +1,179 @@
+import io
+import json
+import os
+
+import pytest
+
+import app as babble
+
+
+def png_bytes(color=(200, 120, 40)):
+    Image = pytest.importorskip("PIL.Image")
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 24), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    return babble.LocalBlobStore(str(tmp_path / "blobs"))
+
+
+def test_same_bytes_with_other_extension_returns_stored_key(local_store):
+    data = png_bytes()
+    first_url, first_variants = babble.store_image(io.BytesIO(data), "png", local_store)
+    # 同一张图改个扩展名再传，不能返回一个从没写过的 .webp 地址
+    second_url, second_variants = babble.store_image(io.BytesIO(data), "webp", local_store)
+    assert second_url == first_url
+    assert second_variants == first_variants
+    key = second_url[len(local_store.url_prefix) + 1:]
+    assert key.endswith(".png")
+    assert local_store.exists(key)
+
+
+class ChunkedStream:
+    def __init__(self, data):
+        self.buf = io.BytesIO(data)
+        self.sizes = []
+
+    def read(self, size):
+        self.sizes.append(size)
+        return self.buf.read(size)
+
+
+def test_stream_to_temp_hashes_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(babble, "BLOB_CHUNK_SIZE", 4)
+    stream = ChunkedStream(b"0123456789")
+    digest, path = babble.stream_to_temp(stream, str(tmp_path))
+    assert digest == babble.hashlib.sha256(b"0123456789").hexdigest()
+    assert open(path, "rb").read() == b"0123456789"
+    assert set(stream.sizes) == {4}
+
+
+def test_stream_to_temp_removes_file_on_error(tmp_path):
+    class Broken:
+        def read(self, size):
+            raise OSError("client went away")
+
+    with pytest.raises(OSError):
+        babble.stream_to_temp(Broken(), str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_duplicate_upload_is_not_processed_again(local_store, monkeypatch):
+    data = png_bytes()
+    url, variants = babble.store_image(io.BytesIO(data), "png", local_store)
+    assert set(variants) == set(babble.IMAGE_VARIANT_SIZES)
+
+    def fail(path):
+        raise AssertionError("重复的图片不应再生成缩略图")
+
+    monkeypatch.setattr(babble, "generate_image_variants", fail)
+    assert babble.store_image(io.BytesIO(data), "png", local_store) == (url, variants)
+    # 临时文件都已清理
+    assert os.listdir(local_store.tmp_dir) == []
+
+
+def test_manifest_is_written_last(local_store, monkeypatch):
+    written = []
+    put_file = local_store.put_file
+
+    def record(key, src_path):
+        written.append(key)
+        put_file(key, src_path)
+
+    monkeypatch.setattr(local_store, "put_file", record)
+    url, variants = babble.store_image(io.BytesIO(png_bytes()), "png", local_store)
+    assert written[-1].endswith(".json")
+    assert len(written) == 2 * len(variants) + 2
+
+    manifest = json.loads(local_store.read(written[-1]))
+    assert local_store.url(manifest["image"]) == url
+    assert manifest["variants"] == variants
+
+
+def test_interrupted_upload_is_redone(local_store, monkeypatch):
+    # 原图写完、manifest 还没写时进程退出：下次上传同一内容要重新补齐
+    data = png_bytes()
+    put_file = local_store.put_file
+
+    def crash_on_manifest(key, src_path):
+        if key.endswith(".json"):
+            raise OSError("disk full")
+        put_file(key, src_path)
+
+    monkeypatch.setattr(local_store, "put_file", crash_on_manifest)
+    with pytest.raises(OSError):
+        babble.store_image(io.BytesIO(data), "png", local_store)
+
+    monkeypatch.setattr(local_store, "put_file", put_file)
+    url, variants = babble.store_image(io.BytesIO(data), "png", local_store)
+    assert variants
+    assert local_store.exists(url[len(local_store.url_prefix) + 1:])
+
+
+def test_legacy_manifest_finds_original_by_extension(local_store):
+    data = png_bytes()
+    digest = babble.hashlib.sha256(data).hexdigest()
+    prefix = f"{digest[:2]}/{digest[2:4]}/{digest}"
+    for key, body in ((f"{prefix}.png", data), (f"{prefix}.json", b'{"thumb":{}}')):
+        path = os.path.join(local_store.tmp_dir, "legacy")
+        with open(path, "wb") as f:
+            f.write(body)
+        local_store.put_file(key, path)
+
+    url, variants = babble.store_image(io.BytesIO(data), "gif", local_store)
+    assert url == local_store.url(f"{prefix}.png")
+    assert variants == {"thumb": {}}
+
+
+def test_blob_route_rejects_unknown_keys(flask_app):
+    client = flask_app.test_client()
+    assert client.get("/blobs/../app.py").status_code == 404
+    assert client.get("/blobs/ab/cd/not-a-hash.png").status_code == 404
+
+
+@pytest.fixture
+def s3_store(monkeypatch):
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        store = babble.S3BlobStore("babble-test", region="us-east-1", prefix="uploads")
+        store.client.create_bucket(Bucket="babble-test")
+        yield store
+
+
+def test_s3_store_dedups_and_serves(s3_store, flask_app, monkeypatch):
+    data = png_bytes()
+    url, variants = babble.store_image(io.BytesIO(data), "png", s3_store)
+    assert url.startswith("/blobs/") and url.endswith(".png")
+    key = url[len("/blobs/"):]
+
+    objects = s3_store.client.list_objects_v2(Bucket="babble-test")["Contents"]
+    assert len(objects) == 2 * len(variants) + 2
+    assert all(obj["Key"].startswith("uploads/") for obj in objects)
+    head = s3_store.client.head_object(Bucket="babble-test", Key=f"uploads/{key}")
+    assert head["ContentType"] == "image/png"
+    assert "immutable" in head["CacheControl"]
+
+    assert babble.store_image(io.BytesIO(data), "webp", s3_store) == (url, variants)
+
+    monkeypatch.setattr(babble, "BLOB_STORE", s3_store)
+    response = flask_app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.mimetype == "image/png"
+
+
+def test_s3_store_public_url_redirects(s3_store, flask_app, monkeypatch):
+    s3_store.public_url = "https://cdn.example.com"
+    url, _ = babble.store_image(io.BytesIO(png_bytes()), "png", s3_store)
+    assert url.startswith("https://cdn.example.com/uploads/")
+
+    monkeypatch.setattr(babble, "BLOB_STORE", s3_store)
+    key = url.split("/uploads/", 1)[1]
+    response = flask_app.test_client().get(f"/blobs/{key}")
+    assert response.status_code == 301
+    assert response.headers["Location"] == url
+    assert not s3_store.exists("00/00/" + "0" * 64 + ".png")
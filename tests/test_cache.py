@@ -0,0 +1,49 @@
+import app as babble
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = babble.LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(babble.time, "monotonic", lambda: now[0])
+    cache = babble.LRUCache(4, ttl=5)
+    cache.set("k", "v")
+    now[0] += 4.9
+    assert cache.get("k") == "v"
+    now[0] += 0.2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_drops_writes_from_an_older_generation():
+    cache = babble.LRUCache(4)
+    generation = cache.generation
+    # 读库期间发生了写操作
+    cache.clear()
+    cache.set("page", "stale", generation)
+    assert cache.get("page") is None
+
+    generation = cache.generation
+    cache.set("page", "fresh", generation)
+    assert cache.get("page") == "fresh"
+
+
+def test_lru_cache_discard_where_bumps_generation():
+    cache = babble.LRUCache(4)
+    cache.set(("new", 1), {"ids": [1, 2]})
+    cache.set(("new", 2), {"ids": [3]})
+    generation = cache.generation
+    cache.discard_where(lambda key, value: 2 in value["ids"])
+    assert cache.generation == generation + 1
+    assert cache.get(("new", 1)) is None
+    assert cache.get(("new", 2)) == {"ids": [3]}
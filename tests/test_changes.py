@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+import app as babble
+
+
+def change(id, age_seconds=0):
+    created = datetime.now() - timedelta(seconds=age_seconds)
+    return {"id": id, "created_at": created.strftime(babble.TIMESTAMP_FORMAT)}
+
+
+def test_settled_change_rows_without_gaps():
+    rows = [change(4), change(5), change(6)]
+    assert babble.settled_change_rows(rows, 3) == rows
+
+
+def test_settled_change_rows_stops_before_fresh_gap():
+    # id 5 还没提交，6 已经可见
+    rows = [change(4), change(6), change(7)]
+    assert babble.settled_change_rows(rows, 3) == rows[:1]
+    assert babble.settled_change_rows(rows[1:], 4) == []
+
+
+def test_settled_change_rows_skips_old_gap():
+    # 空洞之后的记录已经超过等待时间，认为缺的 id 是回滚留下的
+    rows = [change(4, 60), change(6, 60), change(8)]
+    assert babble.settled_change_rows(rows, 3) == rows[:2]
+
+
+def test_settled_change_rows_from_zero():
+    rows = [change(10), change(11)]
+    assert babble.settled_change_rows(rows, 0) == rows
@@ -0,0 +1,43 @@
+import pytest
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import app as babble
+
+
+@pytest.fixture
+def ip_app():
+    # 与 app.py 相同的包装方式，单独建一个小应用便于改代理层数
+    def build(hops):
+        flask_app = Flask(__name__)
+        flask_app.add_url_rule("/ip", "ip", babble.client_ip)
+        if hops:
+            flask_app.wsgi_app = ProxyFix(flask_app.wsgi_app, x_for=hops)
+        return flask_app.test_client()
+    return build
+
+
+def get_ip(client, xff=None):
+    headers = {"X-Forwarded-For": xff} if xff else {}
+    return client.get("/ip", headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.1"}).get_data(as_text=True)
+
+
+def test_spoofed_left_entries_are_ignored(ip_app):
+    client = ip_app(1)
+    # 客户端自己填了 1.1.1.1，代理追加了真实地址 203.0.113.5
+    assert get_ip(client, "1.1.1.1, 203.0.113.5") == "203.0.113.5"
+    assert get_ip(client, "2.2.2.2, 203.0.113.5") == "203.0.113.5"
+    assert get_ip(client) == "10.0.0.1"
+
+
+def test_two_proxy_hops(ip_app):
+    assert get_ip(ip_app(2), "1.1.1.1, 203.0.113.5, 10.1.1.1") == "203.0.113.5"
+
+
+def test_no_trusted_proxy_uses_socket_address(ip_app):
+    assert get_ip(ip_app(0), "1.1.1.1") == "10.0.0.1"
+
+
+def test_app_is_wrapped_with_configured_hops():
+    assert isinstance(babble.app.wsgi_app, ProxyFix)
+    assert babble.app.wsgi_app.x_for == babble.TRUSTED_PROXY_HOPS
@@ -0,0 +1,103 @@
+import gzip
+import json
+
+import pytest
+
+import app as babble
+
+
+def compressed(flask_app, response, accept="gzip"):
+    with flask_app.test_request_context("/messages", headers={"Accept-Encoding": accept}):
+        return babble.compress_response(response)
+
+
+def json_response(flask_app, size):
+    return flask_app.response_class(b"[" + b'"x",' * (size // 4) + b'"x"]', mimetype="application/json")
+
+
+def test_small_json_is_left_alone(flask_app):
+    response = compressed(flask_app, json_response(flask_app, 100))
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_large_json_is_gzipped(flask_app):
+    response = json_response(flask_app, 20000)
+    raw = response.get_data()
+    response.set_etag("abc")
+    response = compressed(flask_app, response)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) == len(response.get_data()) < len(raw)
+    assert gzip.decompress(response.get_data()) == raw
+    # 压缩后的字节和原文不同，强 ETag 降为弱 ETag
+    assert response.get_etag() == ("abc", True)
+
+
+def test_no_compression_without_accept_encoding(flask_app):
+    response = compressed(flask_app, json_response(flask_app, 20000), accept="identity")
+    assert "Content-Encoding" not in response.headers
+
+
+def test_html_and_not_modified_are_skipped(flask_app):
+    html = flask_app.response_class("<p>" * 5000, mimetype="text/html")
+    assert "Content-Encoding" not in compressed(flask_app, html).headers
+
+    not_modified = json_response(flask_app, 20000)
+    not_modified.status_code = 304
+    assert "Content-Encoding" not in compressed(flask_app, not_modified).headers
+
+
+def test_large_body_is_streamed_in_chunks(flask_app, monkeypatch):
+    monkeypatch.setattr(babble, "COMPRESS_STREAM_MIN_SIZE", 10000)
+    monkeypatch.setattr(babble, "COMPRESS_CHUNK_SIZE", 4096)
+    response = json_response(flask_app, 50000)
+    raw = response.get_data()
+    response = compressed(flask_app, response)
+    assert response.is_streamed
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(b"".join(response.response)) == raw
+
+
+def test_generator_response_is_compressed_and_closed(flask_app):
+    closed = []
+
+    def lines():
+        try:
+            for i in range(1000):
+                yield json.dumps({"id": i}) + "\n"
+        finally:
+            closed.append(True)
+
+    response = flask_app.response_class(lines(), mimetype="application/x-ndjson")
+    response = compressed(flask_app, response)
+    assert response.headers["Content-Encoding"] == "gzip"
+    body = gzip.decompress(b"".join(response.response)).decode()
+    assert len(body.splitlines()) == 1000
+
+    # 客户端中途断开：关闭外层生成器时内层也要关掉
+    response = compressed(flask_app, flask_app.response_class(lines(), mimetype="application/x-ndjson"))
+    next(iter(response.response), None)
+    response.close()
+    assert closed == [True, True]
+
+
+@pytest.mark.skipif(babble.brotli is None, reason="未安装 Brotli")
+def test_brotli_preferred_when_available(flask_app):
+    response = json_response(flask_app, 20000)
+    raw = response.get_data()
+    response = compressed(flask_app, response, accept="gzip, br")
+    assert response.headers["Content-Encoding"] == "br"
+    assert babble.brotli.decompress(response.get_data()) == raw
+
+
+def test_json_provider_is_compact_and_keeps_chinese(flask_app):
+    text = flask_app.json.dumps({"b": "中文", "a": 1})
+    assert text == '{"b":"中文","a":1}'
+    # orjson 不支持的大整数退回标准库
+    assert flask_app.json.dumps({"n": 2 ** 70}) == '{"n":1180591620717411303424}'
+
+
+def test_jsonify_goes_through_provider(flask_app):
+    with flask_app.test_request_context("/"):
+        response = babble.jsonify({"message": "留言"})
+    assert response.get_data() == '{"message":"留言"}\n'.encode("utf-8")
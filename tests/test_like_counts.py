@@ -0,0 +1,55 @@
+import app as babble
+
+
+class RecordingCursor:
+    def __init__(self, min_id, max_id, mismatches):
+        self.range = {"min_id": min_id, "max_id": max_id}
+        self.mismatches = mismatches
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+        self.rowcount = 2
+
+    def fetchone(self):
+        return self.range
+
+    def fetchall(self):
+        return self.mismatches
+
+
+class Conn:
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_dry_run_and_fix_share_the_batched_query():
+    rows = [{"id": 3, "current": 5, "actual": 4}]
+    check = RecordingCursor(1, 25, rows)
+    fix = RecordingCursor(1, 25, [])
+    conn = Conn()
+
+    found = babble.reconcile_count_column(conn, check, "messages", "likes", "like_count", 10, dry_run=True)
+    fixed = babble.reconcile_count_column(conn, fix, "messages", "likes", "like_count", 10)
+
+    # 3 个批次：1-10、11-20、21-30
+    assert found == rows * 3
+    assert fixed == 6
+    assert conn.commits == 3
+    selects = check.statements[1:]
+    updates = fix.statements[1:]
+    assert [p for _, p in selects] == [p for _, p in updates] == [(1, 10, 1, 10), (11, 20, 11, 20), (21, 30, 21, 30)]
+    for (select, _), (update, _) in zip(selects, updates):
+        assert select.startswith("SELECT") and update.startswith("UPDATE")
+        where = "WHERE m.id BETWEEN %s AND %s AND m.`like_count` <> COALESCE(c.cnt, 0)"
+        assert select.endswith(where) and update.endswith(where)
+
+
+def test_empty_table():
+    conn = Conn()
+    cursor = RecordingCursor(None, None, [])
+    assert babble.reconcile_count_column(conn, cursor, "messages", "likes", "like_count", dry_run=True) == []
+    assert babble.reconcile_count_column(conn, cursor, "messages", "likes", "like_count") == 0
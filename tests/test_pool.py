@@ -0,0 +1,157 @@
+import threading
+
+import pytest
+
+import app as babble
+
+
+class FakeCursor:
+    def execute(self, sql, args=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeRaw:
+    def __init__(self, n):
+        self.n = n
+        self.open = True
+        self.closed = False
+        self.rollbacks = 0
+        self.ping_ok = True
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self, reconnect=True):
+        if not self.ping_ok:
+            raise ConnectionError("gone away")
+
+    def close(self):
+        self.closed = True
+        self.open = False
+
+
+class Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        raw = FakeRaw(len(self.made))
+        self.made.append(raw)
+        return raw
+
+
+@pytest.fixture
+def pool():
+    return babble.ConnectionPool(Factory(), min_size=0, max_size=2, max_lifetime=3600, timeout=0.2)
+
+
+def test_connections_are_reused(pool):
+    conn = pool.acquire()
+    raw = conn._raw
+    conn.close()
+    conn.close()  # 重复 close 不会重复归还
+    assert pool.stats() == {"size": 1, "idle": 1, "in_use": 0, "max_size": 2}
+    assert pool.acquire()._raw is raw
+
+
+def test_exhausted_pool_times_out(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(babble.PoolExhaustedError):
+        pool.acquire()
+    held[0].close()
+    assert pool.acquire()._raw is held[0]._raw
+
+
+def test_waiter_wakes_when_connection_is_returned(pool):
+    pool.timeout = 5
+    held = [pool.acquire(), pool.acquire()]
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    held[1].close()
+    waiter.join(2)
+    assert got and got[0]._raw is held[1]._raw
+
+
+def test_connection_returned_and_rolled_back_on_exception(pool):
+    with pytest.raises(ValueError):
+        conn = pool.acquire()
+        try:
+            with conn.cursor() as c:
+                c.execute("UPDATE messages SET like_count = 1")
+            raise ValueError("boom")
+        finally:
+            conn.close()
+    raw = pool._connect.made[0]
+    # 未提交的事务在归还时回滚，连接回到空闲列表
+    assert raw.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_broken_connections_are_discarded(pool):
+    conn = pool.acquire()
+    raw = conn._raw
+    raw.open = False
+    conn.close()
+    assert pool.stats()["size"] == 0
+    assert raw.closed
+
+    # 空闲连接取出时 ping 失败：关掉并换一条新的
+    conn = pool.acquire()
+    conn.close()
+    conn._raw.ping_ok = False
+    fresh = pool.acquire()
+    assert fresh._raw is not conn._raw and conn._raw.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_rollback_discards_connection(pool):
+    conn = pool.acquire()
+    conn.cursor()
+
+    def broken():
+        raise ConnectionError("lost")
+
+    conn._raw.rollback = broken
+    conn.close()
+    assert pool.stats()["size"] == 0
+
+
+def test_close_all_bumps_generation(pool):
+    # gunicorn pre_fork：关掉空闲连接，借出中的连接归还时也直接关闭，不再计入连接数
+    idle = pool.acquire()
+    busy = pool.acquire()
+    idle.close()
+    generation = pool._generation
+
+    pool.close_all()
+    assert pool._generation == generation + 1
+    assert idle._raw.closed
+    assert pool.stats()["size"] == 0
+
+    busy.close()
+    assert busy._raw.closed
+    assert pool.stats() == {"size": 0, "idle": 0, "in_use": 0, "max_size": 2}
+    # 新借出的连接属于新一代，照常归还复用
+    conn = pool.acquire()
+    conn.close()
+    assert pool.stats()["idle"] == 1 and not conn._raw.closed
+
+
+def test_expired_connections_are_not_reused(pool, monkeypatch):
+    pool.max_lifetime = 10
+    conn = pool.acquire()
+    clock = babble.time.monotonic() + 11
+    monkeypatch.setattr(babble.time, "monotonic", lambda: clock)
+    conn.close()
+    assert conn._raw.closed
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,105 @@
+import fakeredis
+import pytest
+
+import app as babble
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("5/60", (5 / 60, 5.0)),
+    ("10", (10.0, 10.0)),
+    ("0.5/1", (0.5, 0.5)),
+    ("0/60", None),
+    ("5/0", None),
+    ("abc", None),
+    ("-1/10", None),
+])
+def test_parse_rate_limit(text, expected):
+    assert babble.parse_rate_limit(text) == expected
+
+
+def test_local_backend_allows_burst_then_refills(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(babble.time, "monotonic", clock)
+    backend = babble.LocalRateLimitBackend(max_keys=10)
+    rate, burst = babble.parse_rate_limit("3/60")
+
+    assert [backend.hit("ip", rate, burst)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = backend.hit("ip", rate, burst)
+    assert not allowed
+    assert retry_after == pytest.approx(20)
+
+    # 其他 IP 不受影响
+    assert backend.hit("other", rate, burst)[0]
+
+    clock.now += 20
+    assert backend.hit("ip", rate, burst)[0]
+    assert not backend.hit("ip", rate, burst)[0]
+
+
+def test_local_backend_evicts_least_recent_keys(monkeypatch):
+    monkeypatch.setattr(babble.time, "monotonic", FakeClock())
+    backend = babble.LocalRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        backend.hit(key, 1, 1)
+    assert list(backend._buckets) == ["a", "c"]
+
+
+def test_rate_limiter_ignores_unknown_and_invalid_limits():
+    limiter = babble.RateLimiter({"upload": "bad"}, babble.LocalRateLimitBackend(10))
+    assert limiter.hit("upload", "ip") == (True, 0.0)
+    assert limiter.hit("missing", "ip") == (True, 0.0)
+
+
+def test_rate_limiter_falls_back_to_local_when_shared_fails():
+    class Broken:
+        def hit(self, key, rate, burst):
+            raise ConnectionError("redis down")
+
+    limiter = babble.RateLimiter({"reply": "1/60"}, babble.LocalRateLimitBackend(10), Broken())
+    assert limiter.hit("reply", "ip")[0]
+    assert not limiter.hit("reply", "ip")[0]
+
+
+@pytest.fixture
+def redis_backend():
+    # fakeredis[lua] 用 lupa 执行真实的 Lua 脚本
+    client = fakeredis.FakeRedis()
+    return babble.RedisRateLimitBackend(client=client), client
+
+
+def test_redis_backend_runs_token_bucket_script(redis_backend):
+    backend, client = redis_backend
+    limiter = babble.RateLimiter({"reply": "2/60"}, babble.LocalRateLimitBackend(10), backend)
+
+    assert limiter.hit("reply", "1.2.3.4") == (True, 0.0)
+    assert limiter.hit("reply", "1.2.3.4") == (True, 0.0)
+    allowed, retry_after = limiter.hit("reply", "1.2.3.4")
+    assert not allowed
+    assert 29 < retry_after <= 30
+
+    # 其他 IP 各自一个桶；状态只在 Redis 里，本地后端没有被用到
+    assert limiter.hit("reply", "5.6.7.8")[0]
+    assert not limiter.local._buckets
+
+    key = "babble:rl:reply:1.2.3.4"
+    assert float(client.hget(key, "tokens")) < 1
+    # 桶装满所需时间 + 1 秒后自动过期
+    assert 0 < client.pttl(key) <= 61000
+
+
+def test_redis_backend_refills_over_time(redis_backend):
+    backend, client = redis_backend
+    key = "babble:rl:k"
+    assert backend.hit("k", 1, 1)[0]
+    assert not backend.hit("k", 1, 1)[0]
+    # 把上次更新时间往前挪，相当于过了 2 秒
+    client.hset(key, "ts", str(float(client.hget(key, "ts")) - 2))
+    assert backend.hit("k", 1, 1)[0]
@@ -0,0 +1,106 @@
+import pytest
+
+import app as babble
+
+
+class NamedPool:
+    def __init__(self, name):
+        self.name = name
+
+    def acquire(self):
+        return self.name
+
+
+class BrokenPool(NamedPool):
+    def acquire(self):
+        raise ConnectionError("refused")
+
+
+@pytest.fixture
+def lags(monkeypatch):
+    """各副本的复制延迟；None 表示没在复制。check 按这里的值更新，不连数据库。"""
+    lags = {}
+
+    def check(replica, max_lag):
+        replica.lag = lags.get(replica.name)
+        replica.healthy = replica.lag is not None and replica.lag <= max_lag
+
+    monkeypatch.setattr(babble.Replica, "check", check)
+    monkeypatch.setattr(babble, "DB_POOL", NamedPool("primary"))
+    return lags
+
+
+@pytest.fixture
+def router(monkeypatch, lags):
+    replicas = [babble.Replica("r1", NamedPool("r1")), babble.Replica("r2", NamedPool("r2"))]
+    # check_interval=0：每次都重新检查延迟
+    router = babble.ReplicaRouter(replicas, max_lag=5, check_interval=0)
+    monkeypatch.setattr(babble, "REPLICA_ROUTER", router)
+    return router
+
+
+def read(flask_app):
+    with flask_app.test_request_context("/messages"):
+        return babble.get_read_conn()
+
+
+def test_reads_rotate_across_healthy_replicas(flask_app, router, lags):
+    lags.update(r1=0, r2=1)
+    assert [read(flask_app) for _ in range(4)] == ["r1", "r2", "r1", "r2"]
+
+
+def test_lagging_replica_is_skipped(flask_app, router, lags):
+    lags.update(r1=30, r2=1)
+    assert [read(flask_app) for _ in range(3)] == ["r2", "r2", "r2"]
+
+    # 都落后太多或没在复制：回到主库
+    lags.update(r1=30, r2=None)
+    assert read(flask_app) == "primary"
+    lags.update(r1=2)
+    assert read(flask_app) == "r1"
+
+
+def test_unreachable_replica_is_marked_down(flask_app, router, lags, monkeypatch):
+    lags.update(r1=0, r2=0)
+    router.replicas[0].pool = BrokenPool("r1")
+    router.check_interval = 60
+    assert read(flask_app) == "r2"
+    assert not router.replicas[0].healthy
+    # 检查间隔内不再尝试 r1
+    assert [read(flask_app) for _ in range(2)] == ["r2", "r2"]
+
+
+def test_recent_writer_reads_from_primary(flask_app, router, lags, monkeypatch):
+    lags.update(r1=0, r2=0)
+    now = 1000.0
+    monkeypatch.setattr(babble.time, "time", lambda: now)
+    with flask_app.test_request_context("/messages"):
+        babble.pin_reads_to_primary()
+        assert babble.session["primary_until"] == now + babble.REPLICA_STICKY_SECONDS
+        # 窗口内即使副本健康也读主库
+        assert babble.get_read_conn() == "primary"
+
+        now += babble.REPLICA_STICKY_SECONDS + 1
+        assert babble.get_read_conn() in ("r1", "r2")
+
+
+def test_sticky_window_survives_across_requests(flask_app, router, lags):
+    lags.update(r1=0, r2=0)
+    with flask_app.test_request_context("/reply", method="POST"):
+        babble.pin_reads_to_primary()
+        response = flask_app.response_class()
+        flask_app.session_interface.save_session(flask_app, babble.session, response)
+        cookie = response.headers["Set-Cookie"].split(";", 1)[0]
+
+    # 下一个请求带着签名 cookie（可能落到别的 worker），固定读主库；别的访客不受影响
+    with flask_app.test_request_context("/messages", headers={"Cookie": cookie}):
+        assert babble.get_read_conn() == "primary"
+    assert read(flask_app) in ("r1", "r2")
+
+
+def test_no_replicas_always_primary(flask_app, lags, monkeypatch):
+    monkeypatch.setattr(babble, "REPLICA_ROUTER", babble.ReplicaRouter([]))
+    with flask_app.test_request_context("/messages"):
+        babble.pin_reads_to_primary()
+        assert "primary_until" not in babble.session
+        assert babble.get_read_conn() == "primary"
@@ -0,0 +1,227 @@
+import app as babble
+
+
+class EmptyChangesCursor:
+    """_catch_up 只会查 board_changes，这里始终返回没有新变更。"""
+
+    def execute(self, sql, params=None):
+        assert "board_changes" in sql
+
+    def fetchall(self):
+        return []
+
+
+def built_index(rows):
+    index = babble.InvertedIndex()
+    for kind, row in rows:
+        index._add(index._postings, index._docs, (kind, row["id"]), dict(row, type=kind))
+    index.version = 0
+    return index
+
+
+def message(id, content):
+    return {"id": id, "message_id": id, "username": "u", "content": content, "created_at": "2024-01-01 00:00:00"}
+
+
+def test_search_tokens_cjk_bigrams_and_words():
+    assert babble.search_tokens("食堂好吃") == ["食堂", "堂好", "好吃"]
+    assert babble.search_tokens("饭") == ["饭"]
+    assert babble.search_tokens("Hello 世界 2024") == ["世界", "hello", "2024"]
+    assert babble.search_tokens(None) == []
+
+
+def test_inverted_index_requires_all_tokens_and_ranks_by_tf():
+    index = built_index([
+        ("message", message(1, "今天食堂")),
+        ("message", message(2, "食堂食堂的饭")),
+        ("message", message(3, "图书馆")),
+        ("reply", dict(message(4, "食堂关门了"), message_id=1)),
+    ])
+    hits = index.search(EmptyChangesCursor(), {"mode": "new"}, "食堂", 0, 10)
+    assert [(h["type"], h["id"]) for h in hits] == [("message", 2), ("reply", 4), ("message", 1)]
+    assert hits[1]["message_id"] == 1
+
+    assert index.search(EmptyChangesCursor(), {"mode": "new"}, "食堂 图书馆", 0, 10) == []
+    assert index.search(EmptyChangesCursor(), {"mode": "new"}, "!!", 0, 10) == []
+
+
+def test_inverted_index_pages_with_one_extra_hit():
+    index = built_index([("message", message(i, "食堂")) for i in range(1, 6)])
+    page = index.search(EmptyChangesCursor(), {"mode": "new"}, "食堂", 0, 2)
+    # 多取一条用来判断是否还有下一页
+    assert [h["id"] for h in page] == [5, 4, 3]
+    page = index.search(EmptyChangesCursor(), {"mode": "new"}, "食堂", 4, 2)
+    assert [h["id"] for h in page] == [1]
+
+
+def test_inverted_index_not_ready_starts_background_build(monkeypatch):
+    index = babble.InvertedIndex()
+    started = []
+    monkeypatch.setattr(index, "_build", lambda tables: started.append(tables))
+    assert index.search(EmptyChangesCursor(), {"mode": "new"}, "食堂", 0, 10) is None
+    index._builder.join(1)
+    assert started == [{"mode": "new"}]
+
+
+class BoardCursor:
+    """按 SQL 模拟 board_changes 和 messages；执行查询时索引锁不能被持有。"""
+
+    def __init__(self, index, messages):
+        self.index = index
+        self.messages = {row["id"]: row for row in messages}
+        self.changes = [{"id": i, "kind": "message", "message_id": mid, "reply_id": None, "created_at": "2024-01-01 00:00:00"}
+                        for i, mid in enumerate(sorted(self.messages), 1)]
+        self.change_queries = 0
+        self._result = []
+
+    def execute(self, sql, params=None):
+        assert not self.index._lock.locked()
+        if "board_changes" in sql:
+            self.change_queries += 1
+            since, limit = params
+            self._result = [c for c in self.changes if c["id"] > since][:limit]
+        else:
+            self._result = [self.messages[i] for i in params if i in self.messages]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_catch_up_reads_in_batches_outside_the_lock(monkeypatch):
+    monkeypatch.setattr(babble, "BOARD_CHANGES_MAX_BATCH", 2)
+    index = built_index([])
+    cursor = BoardCursor(index, [message(i, f"食堂{i}") for i in range(1, 6)])
+
+    hits = index.search(cursor, {"mode": "new", "message_table": "messages"}, "食堂", 0, 10)
+    assert [h["id"] for h in hits] == [5, 4, 3, 2, 1]
+    assert index.version == 5
+    # 5 条变更分 3 批读完
+    assert cursor.change_queries == 3
+
+
+def test_catch_up_evicts_oldest_docs_over_cap(monkeypatch):
+    monkeypatch.setattr(babble, "SEARCH_INDEX_MAX_ROWS", 3)
+    index = built_index([])
+    cursor = BoardCursor(index, [message(i, f"食堂{i}") for i in range(1, 6)])
+
+    hits = index.search(cursor, {"mode": "new", "message_table": "messages"}, "食堂", 0, 10)
+    assert [h["id"] for h in hits] == [5, 4, 3]
+    assert index.truncated
+    assert sorted(index._docs) == [("message", 3), ("message", 4), ("message", 5)]
+    # 被淘汰文档独有的词（"1"、"2"）也从倒排表里删掉
+    assert "1" not in index._postings and "2" not in index._postings
+    assert set(index._postings["食堂"]) == set(index._docs)
+
+
+class RecordingCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+ARCHIVE_TABLES = dict(babble.tables_for_mode("new"), archive=True, fulltext=True)
+
+
+def test_fulltext_search_covers_archive_tables():
+    cursor = RecordingCursor([dict(message(7, "食堂"), type="message", score=1.5)])
+    hits = babble.fulltext_search(cursor, ARCHIVE_TABLES, "食堂", 0, 10)
+    assert hits[0]["id"] == 7
+
+    sql, params = cursor.statements[0]
+    for table in ("messages", "replies", "messages_archive", "replies_archive"):
+        assert f"FROM `{table}` t" in sql
+    assert sql.count("UNION ALL") == 3
+    # 每个子查询 (q, q, window)，最后是 LIMIT / OFFSET
+    assert params == ("食堂", "食堂", 11) * 4 + (11, 0)
+
+    babble.fulltext_search(cursor, dict(ARCHIVE_TABLES, archive=False), "食堂", 0, 10)
+    assert "_archive" not in cursor.statements[1][0]
+
+
+def test_detect_fulltext_requires_archive_indexes():
+    hot = [{"table_name": t, "index_name": i} for t, i in babble.FULLTEXT_INDEXES]
+    archive = [{"table_name": t, "index_name": i} for t, i in babble.ARCHIVE_FULLTEXT_INDEXES]
+    assert babble.detect_fulltext(RecordingCursor(hot))
+    assert not babble.detect_fulltext(RecordingCursor(hot), archive=True)
+    assert babble.detect_fulltext(RecordingCursor(hot + archive), archive=True)
+
+
+class TableCursor:
+    """按表名返回 id 倒序的行，模拟 _load_rows 的分页查询。"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self._result = []
+
+    def execute(self, sql, params=None):
+        if "board_changes" in sql:
+            self._result = []
+            return
+        table = sql.split("FROM `", 1)[1].split("`", 1)[0]
+        rows = sorted(self.tables.get(table, []), key=lambda row: -row["id"])
+        if "WHERE" in sql:
+            rows = [row for row in rows if row["id"] < params[0]]
+        limit = params[-1] if params and "LIMIT %s" in sql else 1
+        self._result = [dict(row) for row in rows[:limit]]
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class TableConn:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self):
+        return TableCursor(self.tables)
+
+    def close(self):
+        pass
+
+
+def reply(id, message_id, content):
+    return dict(message(id, content), message_id=message_id)
+
+
+def test_build_loads_archive_after_hot_within_cap(monkeypatch):
+    monkeypatch.setattr(babble, "SEARCH_INDEX_MAX_ROWS", 3)
+    data = {
+        "messages": [message(5, "食堂热"), message(6, "食堂热")],
+        "messages_archive": [message(i, "食堂旧") for i in (1, 2, 3)],
+        "replies": [],
+        "replies_archive": [reply(1, 1, "食堂回复")],
+    }
+    monkeypatch.setattr(babble, "open_raw_conn", lambda: TableConn(data))
+    index = babble.InvertedIndex()
+    index._build(ARCHIVE_TABLES)
+
+    # 热表 2 条 + 归档表里最新的 1 条，更早的归档留言超出上限
+    assert list(index._order["message"]) == [3, 5, 6]
+    assert list(index._order["reply"]) == [1]
+    assert index.truncated
+    hits = index.search(EmptyChangesCursor(), ARCHIVE_TABLES, "食堂回复", 0, 10)
+    assert [(h["type"], h["id"], h["message_id"]) for h in hits] == [("reply", 1, 1)]
+
+
+def test_build_without_archive_overflow_is_complete(monkeypatch):
+    data = {"messages": [message(2, "食堂")], "messages_archive": [message(1, "食堂")], "replies": [], "replies_archive": []}
+    monkeypatch.setattr(babble, "open_raw_conn", lambda: TableConn(data))
+    index = babble.InvertedIndex()
+    index._build(ARCHIVE_TABLES)
+    assert not index.truncated
+    assert [h["id"] for h in index.search(EmptyChangesCursor(), ARCHIVE_TABLES, "食堂", 0, 10)] == [2, 1]
@@ -0,0 +1,63 @@
+import pytest
+
+import app as babble
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM messages WHERE id = 42", "SELECT * FROM messages WHERE id = ?"),
+    ("SELECT * FROM messages WHERE username = 'bob'", "SELECT * FROM messages WHERE username = ?"),
+    ("SELECT id FROM likes WHERE message_id IN (1, 2, 3)", "SELECT id FROM likes WHERE message_id IN (...)"),
+    ("SELECT id FROM likes WHERE message_id IN (%s, %s)", "SELECT id FROM likes WHERE message_id IN (...)"),
+    ("SELECT  id\n  FROM messages\n  LIMIT %s", "SELECT id FROM messages LIMIT ?"),
+])
+def test_normalize_sql(sql, expected):
+    assert babble.normalize_sql(sql) == expected
+
+
+def test_normalize_sql_groups_different_literals():
+    a = babble.normalize_sql("UPDATE messages SET like_count = 3 WHERE id = 7")
+    b = babble.normalize_sql("UPDATE messages SET like_count = 10 WHERE id = 12345")
+    assert a == b
+
+
+def test_histogram_snapshot_merge_sums_workers():
+    hist = babble.Histogram("t_seconds", "test", (0.1, 1))
+    hist.observe(0.05, route="/a")
+    hist.observe(0.5, route="/a")
+    values = {}
+    hist.merge(values, hist.snapshot())
+    hist.merge(values, hist.snapshot())
+    assert values == {(("route", "/a"),): [2, 4, 1.1, 4]}
+    assert 't_seconds_count{route="/a"} 4' in hist.render(values)
+
+
+def test_metrics_sum_counters_across_worker_files(flask_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(babble, "METRICS_DIR", str(tmp_path))
+    counter = babble.Counter("t_total", "test")
+    monkeypatch.setattr(babble, "METRICS", [counter])
+    monkeypatch.setattr(babble, "gauge_samples", lambda: [("babble_sse_subscribers", (), 3)])
+
+    # 另一个 worker（pid 1）已写好的文件
+    babble.write_json_atomic(str(tmp_path / "counters_1.json"), {"t_total": [[[["route", "/x"]], 5]]})
+    babble.write_json_atomic(str(tmp_path / "gauges_1.json"), [["babble_sse_subscribers", [], 7]])
+    counter.inc(route="/x")
+
+    body = flask_app.test_client().get("/metrics").get_data(as_text=True)
+    assert 't_total{route="/x"} 6' in body
+    assert 'babble_sse_subscribers{pid="1"} 7' in body
+    assert f'babble_sse_subscribers{{pid="{babble.os.getpid()}"}} 3' in body
+
+    # worker 退出：计数保留，gauge 删除
+    babble.flush_metrics(final=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["counters_1.json", f"counters_{babble.os.getpid()}.json", "gauges_1.json"]
+    babble.remove_worker_gauges(1)
+    body = flask_app.test_client().get("/metrics").get_data(as_text=True)
+    assert 't_total{route="/x"} 6' in body
+    assert 'pid="1"' not in body
+
+
+def test_metrics_without_metrics_dir_reports_this_process(flask_app, monkeypatch):
+    monkeypatch.setattr(babble, "METRICS_DIR", "")
+    body = flask_app.test_client().get("/metrics").get_data(as_text=True)
+    assert "# TYPE babble_db_pool_size gauge" in body
+    assert "pid=" not in body